@@ -0,0 +1,236 @@
+import fitz  # PyMuPDF, for PDF handling
+import hashlib
+import json
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    page_count INTEGER NOT NULL,
+    metadata TEXT NOT NULL,
+    first_page BLOB NOT NULL,
+    text BLOB NOT NULL,
+    spans BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_sha256 ON documents (sha256);
+"""
+
+
+def file_sha256(pdf_path: Path) -> str:
+    h = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _pack(s: str) -> bytes:
+    return zlib.compress(s.encode("utf-8"))
+
+
+def _unpack(b: bytes) -> str:
+    return zlib.decompress(b).decode("utf-8")
+
+
+class Extraction:
+    """
+    Everything we pull out of a PDF, as stored on disk.
+    The text and spans stay compressed until you actually ask for them.
+    """
+
+    def __init__(self, path, sha256, page_count, metadata, first_page, text, spans):
+        self.path = Path(path)
+        self.sha256 = sha256
+        self.page_count = page_count
+        self._metadata = metadata
+        self._first_page = first_page
+        self._text = text
+        self._spans = spans
+
+    @property
+    def metadata(self) -> Dict:
+        if isinstance(self._metadata, str):
+            self._metadata = json.loads(self._metadata)
+        return self._metadata
+
+    @property
+    def first_page(self) -> str:
+        if isinstance(self._first_page, bytes):
+            self._first_page = _unpack(self._first_page)
+        return self._first_page
+
+    @property
+    def text(self) -> str:
+        if isinstance(self._text, bytes):
+            self._text = _unpack(self._text)
+        return self._text
+
+    @property
+    def spans(self) -> List[Dict]:
+        """Text spans from the first page: text, font, size and bbox."""
+        if isinstance(self._spans, bytes):
+            self._spans = json.loads(_unpack(self._spans))
+        return self._spans
+
+
+def extract_document(pdf_path: Path, sha256: Optional[str] = None) -> Extraction:
+    """Opens the PDF once and pulls out everything we'd want to keep."""
+    with fitz.open(pdf_path) as doc:
+        metadata = doc.metadata or {}
+        pages = [page.get_text() for page in doc]
+        spans = []
+        if doc.page_count:
+            for block in doc[0].get_text("dict")["blocks"]:
+                for line in block.get("lines", []):
+                    for span in line["spans"]:
+                        spans.append(
+                            {
+                                "text": span["text"],
+                                "font": span["font"],
+                                "size": round(span["size"], 2),
+                                "bbox": [round(v, 1) for v in span["bbox"]],
+                            }
+                        )
+        page_count = doc.page_count
+
+    return Extraction(
+        pdf_path,
+        sha256 or file_sha256(pdf_path),
+        page_count,
+        metadata,
+        pages[0] if pages else "",
+        "".join(pages),
+        spans,
+    )
+
+
+class ExtractionStore:
+    """
+    An SQLite file of per-document extraction results, one row per PDF.
+    Rows are keyed by path, and validated by size + mtime, falling back to the
+    content hash so renamed or touched files don't need to be parsed again.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _row_to_extraction(self, row) -> Extraction:
+        path, sha256, page_count, metadata, first_page, text, spans = row
+        return Extraction(path, sha256, page_count, metadata, first_page, text, spans)
+
+    def get(self, pdf_path: Path) -> Optional[Extraction]:
+        """Gives you back the stored extraction for pdf_path, or None if it's missing or stale."""
+        return self._lookup(pdf_path)[0]
+
+    def _lookup(self, pdf_path: Path) -> Tuple[Optional[Extraction], Optional[str]]:
+        """
+        Like get, but also hands back the content hash if we had to compute it,
+        so a miss doesn't mean reading the file twice.
+        """
+        pdf_path = Path(pdf_path).resolve()
+        stat = pdf_path.stat()
+        columns = "path, sha256, page_count, metadata, first_page, text, spans"
+
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {columns} FROM documents WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (str(pdf_path), stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if row:
+            return self._row_to_extraction(row), None
+
+        # Same bytes under a different path or mtime, i.e. we renamed it last run.
+        sha256 = file_sha256(pdf_path)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {columns} FROM documents WHERE sha256 = ? AND size = ?",
+                (sha256, stat.st_size),
+            ).fetchone()
+            if not row:
+                return None, sha256
+            if Path(row[0]).exists():
+                # A duplicate copy, keep both rows.
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents "
+                    "SELECT ?, size, ?, sha256, page_count, metadata, first_page, text, spans "
+                    "FROM documents WHERE path = ?",
+                    (str(pdf_path), stat.st_mtime_ns, row[0]),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE OR REPLACE documents SET path = ?, mtime_ns = ? WHERE path = ?",
+                    (str(pdf_path), stat.st_mtime_ns, row[0]),
+                )
+            self._conn.commit()
+        return self._row_to_extraction((str(pdf_path),) + row[1:]), sha256
+
+    def put(self, extraction: Extraction) -> None:
+        pdf_path = extraction.path.resolve()
+        stat = pdf_path.stat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(pdf_path),
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    extraction.sha256,
+                    extraction.page_count,
+                    json.dumps(extraction.metadata),
+                    _pack(extraction.first_page),
+                    _pack(extraction.text),
+                    _pack(json.dumps(extraction.spans)),
+                ),
+            )
+            self._conn.commit()
+
+    def load(self, pdf_path: Path) -> Extraction:
+        """Reads from the store if we can, otherwise parses the PDF and stores the result."""
+        extraction, sha256 = self._lookup(pdf_path)
+        if extraction is None:
+            extraction = extract_document(Path(pdf_path), sha256)
+            self.put(extraction)
+        return extraction
+
+    def move(self, old_path: Path, new_path: Path) -> None:
+        """Keeps a row pointing at the file after we've renamed it."""
+        new_path = Path(new_path).resolve()
+        stat = new_path.stat()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE OR REPLACE documents SET path = ?, mtime_ns = ? WHERE path = ?",
+                (str(new_path), stat.st_mtime_ns, str(Path(old_path).resolve())),
+            )
+            self._conn.commit()
+
+    def prune_missing(self, directories: List[Path]) -> int:
+        """
+        Drops rows for files under directories that no longer exist.
+        Run it after processing, so files renamed elsewhere are found by hash first.
+        """
+        prefixes = [Path(d).resolve() for d in directories]
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM documents").fetchall()
+            removed = 0
+            for (path,) in rows:
+                if not any(Path(path).is_relative_to(p) for p in prefixes):
+                    continue
+                if not Path(path).exists():
+                    self._conn.execute("DELETE FROM documents WHERE path = ?", (path,))
+                    removed += 1
+            self._conn.commit()
+        return removed
@@ -10,6 +10,10 @@ import fitz  # PyMuPDF, for PDF handling
 import json
 import requests
 import logging
+import sqlite3
+import argparse
+from extraction_store import ExtractionStore
+from search_index import SearchIndex
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -101,17 +105,20 @@ def rename_pdf(input_file, new_title, auto=False, output_dir=None):
 
     if new_file_path.exists():
         logger.info(f"File {new_file_name} already exists.")
-        return
+        return None
     if auto:
         input_file.rename(new_file_path)
         logger.info(f"Renamed to {new_file_name}")
+        return new_file_path
     else:
         response = input(f"Rename '{input_file.name}' to '{new_file_name}'? [y/N]: ")
         if response.lower() == 'y':
             input_file.rename(new_file_path)
             logger.info(f"Renamed to {new_file_name}")
+            return new_file_path
         else:
             logger.info("Rename cancelled.")
+            return None
 
 def generate_title_with_llm(text):
     prompt = f"""
@@ -183,12 +190,34 @@ texel access for each texture map lookup (Figure 1)."
         logger.error("Title not found in LLM output")
         return "Title not found"
 
-def process_file(input_file, auto=False, force_llm=False, output_dir=None):
+def load_extraction(input_file, store=None):
+    # With a store we only parse PDFs we haven't seen before
+    if store is None:
+        return extract_text_from_pdf(input_file), None
+    try:
+        extraction = store.load(input_file)
+        return extraction.text, extraction
+    except Exception as e:
+        logger.error(f"Error extracting text from {input_file}: {e}")
+        return None, None
+
+def record_result(input_file, new_path, title, text, metadata, store=None, index=None):
+    # Keep the store/index pointing at wherever the file ended up
+    if store and new_path:
+        store.move(input_file, new_path)
+    if index:
+        if new_path is None:
+            # Not renamed, so index the title the file actually has
+            metadata_title = metadata.get("title", None)
+            title = metadata_title if metadata_title and is_valid_title(metadata_title) else Path(input_file).stem
+        index.add(new_path or input_file, title, metadata, text, old_path=input_file)
+
+def process_file(input_file, auto=False, force_llm=False, output_dir=None, store=None, index=None):
     try:
         logger.info(f"\033[95mProcessing: {input_file}\033[0m")
         new_title = None
 
-        text = extract_text_from_pdf(input_file)
+        text, extraction = load_extraction(input_file, store)
         if not text:
             return
 
@@ -199,15 +228,21 @@ def process_file(input_file, auto=False, force_llm=False, output_dir=None):
 
             logger.info(f"\033[92mGenerated title: {new_title} in {end:.2f}s\033[0m")
 
-            rename_pdf(input_file, sanitize_filename(new_title), auto, output_dir)
+            # Read before renaming, the index is the only thing that wants it here
+            if extraction:
+                metadata = extraction.metadata
+            else:
+                metadata = get_metadata(input_file) if index else {}
+            new_path = rename_pdf(input_file, sanitize_filename(new_title), auto, output_dir)
+            record_result(input_file, new_path, new_title, text, metadata, store, index)
             return
 
-        metadata = get_metadata(input_file)
+        metadata = extraction.metadata if extraction else get_metadata(input_file)
         metadata_title = metadata.get("title", None)
         if metadata_title and is_valid_title(metadata_title):
             logger.info(f"Using metadata title: {metadata_title}")
             new_title = sanitize_filename(metadata_title)
-            rename_pdf(input_file, new_title, auto, output_dir)
+            new_path = rename_pdf(input_file, new_title, auto, output_dir)
         else:
             logger.info("Forcing LLM to generate a title")
             t1 = perf_counter()
@@ -216,15 +251,17 @@ def process_file(input_file, auto=False, force_llm=False, output_dir=None):
 
             logger.info(f"\033[92mGenerated title: {new_title} in {end:.2f}s\033[0m")
 
-            rename_pdf(input_file, sanitize_filename(new_title), auto, output_dir)
+            new_path = rename_pdf(input_file, sanitize_filename(new_title), auto, output_dir)
+
+        record_result(input_file, new_path, new_title, text, metadata, store, index)
 
     except Exception as e:
         logger.error(f"Error processing {input_file}: {e}")
 
-def process_files_concurrently(files, auto=False, force_llm=False, output_dir=None):
+def process_files_concurrently(files, auto=False, force_llm=False, output_dir=None, store=None, index=None):
     with ThreadPoolExecutor() as executor:
         futures = {
-            executor.submit(process_file, file, auto, force_llm, output_dir): file
+            executor.submit(process_file, file, auto, force_llm, output_dir, store, index): file
             for file in files
         }
         # Always show the progress bar
@@ -235,22 +272,83 @@ def process_files_concurrently(files, auto=False, force_llm=False, output_dir=No
                 file = futures[future]
                 logger.error(f"Error processing {file}: {e}")
 
-def main(input, auto=False, force_llm=False, silent=False, output_dir=None):
+def main(input, auto=False, force_llm=False, silent=False, output_dir=None, store=None, index=None):
     # Adjust logging level based on silent flag
     if silent:
         console_handler.setLevel(logging.CRITICAL)
     else:
         console_handler.setLevel(logging.INFO)
 
+    # Cache of extracted text/metadata, so re-runs skip PDF parsing
+    extraction_store = ExtractionStore(store) if store else None
+    # Full-text index of everything we process, see `main.py search`
+    search_index = SearchIndex(index) if index else None
+
     input_path = Path(input)
-    if input_path.is_dir():
-        files = list(input_path.glob("*.pdf"))
-        for file in files:
-            remove_empty_files(file)
-        process_files_concurrently(files, auto, force_llm, output_dir)
-    else:
-        remove_empty_files(input_path)
-        process_file(input_path, auto, force_llm, output_dir)
+    # Only forget files under the directories we're working in, other libraries may just be unmounted
+    prune_dirs = [input_path if input_path.is_dir() else input_path.parent]
+    if output_dir:
+        prune_dirs.append(Path(output_dir))
+    try:
+        if input_path.is_dir():
+            files = list(input_path.glob("*.pdf"))
+            for file in files:
+                remove_empty_files(file)
+            process_files_concurrently(files, auto, force_llm, output_dir, extraction_store, search_index)
+        else:
+            remove_empty_files(input_path)
+            process_file(input_path, auto, force_llm, output_dir, extraction_store, search_index)
+
+        if extraction_store:
+            extraction_store.prune_missing(prune_dirs)
+        if search_index:
+            search_index.prune_missing(prune_dirs)
+    finally:
+        if extraction_store:
+            extraction_store.close()
+        if search_index:
+            search_index.close()
+
+def search(query, index, limit=20, phrase=False):
+    if not Path(index).is_file():
+        logger.error(f"No search index at {index}, build one with --index first.")
+        return
+
+    if phrase:
+        # Match the text as-is, rather than as FTS5 query syntax
+        query = '"' + query.replace('"', '""') + '"'
+
+    search_index = SearchIndex(index)
+    try:
+        results = search_index.search(query, limit)
+    except sqlite3.OperationalError as e:
+        logger.error(f"Couldn't understand the query '{query}' ({e}), try --phrase to search for it literally.")
+        return
+    except Exception as e:
+        logger.error(f"Error searching {index}: {e}")
+        return
+    finally:
+        search_index.close()
+
+    if not results:
+        print("No matches.")
+    for result in results:
+        print(f"\033[92m{result['title']}\033[0m")
+        print(f"  {result['path']}")
+        print(f"  {' '.join(result['snippet'].split())}")
+
+def search_main(argv):
+    # Plain argparse rather than fire, so the query reaches FTS5 exactly as typed
+    parser = argparse.ArgumentParser(prog="main.py search", description="Search a titler index.")
+    parser.add_argument("query", type=str, help="An FTS5 query, e.g. 'texture AND filtering'.")
+    parser.add_argument("--index", type=str, required=True, help="The index built with --index.")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of results.")
+    parser.add_argument("--phrase", action="store_true", help="Search for the query as a literal phrase.")
+    args = parser.parse_args(argv)
+    search(args.query, args.index, args.limit, args.phrase)
 
 if __name__ == "__main__":
-    fire.Fire(main)
+    if len(sys.argv) > 1 and sys.argv[1] == "search":
+        search_main(sys.argv[2:])
+    else:
+        fire.Fire(main)
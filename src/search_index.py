@@ -0,0 +1,113 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5 (
+    title, authors, metadata, text, tokenize = 'porter unicode61'
+);
+"""
+
+
+class SearchIndex:
+    """
+    A local SQLite FTS5 index of titles, metadata and text for the collection.
+    Each row in `files` shares its id with the matching row in `files_fts`.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _delete(self, path: str) -> None:
+        row = self._conn.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM files_fts WHERE rowid = ?", row)
+            self._conn.execute("DELETE FROM files WHERE id = ?", row)
+
+    def add(
+        self,
+        pdf_path: Path,
+        title: str,
+        metadata: Dict,
+        text: str,
+        old_path: Optional[Path] = None,
+    ) -> None:
+        """
+        Indexes pdf_path, replacing whatever was there before.
+        Pass old_path if the file has just been renamed so the stale entry goes too.
+        Files that haven't changed on disk and keep the same title are left alone.
+        """
+        pdf_path = Path(pdf_path).resolve()
+        stat = pdf_path.stat()
+        with self._lock:
+            unchanged = self._conn.execute(
+                "SELECT 1 FROM files JOIN files_fts ON files_fts.rowid = files.id "
+                "WHERE files.path = ? AND files.size = ? AND files.mtime_ns = ? AND files_fts.title = ?",
+                (str(pdf_path), stat.st_size, stat.st_mtime_ns, title),
+            ).fetchone()
+            if unchanged:
+                return
+            if old_path is not None:
+                self._delete(str(Path(old_path).resolve()))
+            self._delete(str(pdf_path))
+            cur = self._conn.execute(
+                "INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                (str(pdf_path), stat.st_size, stat.st_mtime_ns),
+            )
+            self._conn.execute(
+                "INSERT INTO files_fts (rowid, title, authors, metadata, text) VALUES (?, ?, ?, ?, ?)",
+                (
+                    cur.lastrowid,
+                    title,
+                    metadata.get("author", "") or "",
+                    json.dumps(metadata),
+                    text,
+                ),
+            )
+            self._conn.commit()
+
+    def prune_missing(self, directories: List[Path]) -> int:
+        """Drops entries for files under directories that no longer exist."""
+        prefixes = [Path(d).resolve() for d in directories]
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM files").fetchall()
+            removed = 0
+            for (path,) in rows:
+                if not any(Path(path).is_relative_to(p) for p in prefixes):
+                    continue
+                if not Path(path).exists():
+                    self._delete(path)
+                    removed += 1
+            self._conn.commit()
+        return removed
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Runs an FTS5 query, best matches first."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT files.path, files_fts.title,
+                       snippet(files_fts, 3, '\033[1m', '\033[0m', '...', 16)
+                FROM files_fts JOIN files ON files.id = files_fts.rowid
+                WHERE files_fts MATCH ?
+                ORDER BY bm25(files_fts, 10.0, 5.0, 1.0, 1.0)
+                LIMIT ?
+                """,
+                (query, limit),
+            ).fetchall()
+        return [{"path": p, "title": t, "snippet": s} for p, t, s in rows]
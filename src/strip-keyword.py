@@ -1,5 +1,10 @@
 import os
+import re
+import json
 import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 
 def strip_keyword_from_files(root_dir, keyword, dry_run=False):
@@ -20,6 +25,204 @@ def strip_keyword_from_files(root_dir, keyword, dry_run=False):
         print("No files found containing the keyword.")
 
 
+def load_rules(rules_file):
+    """
+    Reads a rule file, one pattern per line.
+    Lines are literal keywords unless prefixed with 're:', in which case they're regexes.
+    Blank lines and lines starting with '#' are ignored.
+    Raises ValueError, naming the line, for a regex that won't compile.
+    """
+    rules = []
+    with open(rules_file, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            if line.startswith("re:"):
+                try:
+                    re.compile(line[3:])
+                except re.error as e:
+                    raise ValueError(f"{rules_file}:{lineno}: bad regex '{line[3:]}': {e}")
+                rules.append(line[3:])
+            else:
+                rules.append(re.escape(line))
+    return rules
+
+
+def compile_rules(rules):
+    """
+    Combines every rule into a single alternation so each name is scanned once.
+    Longer patterns go first, so 'foo-bar' wins over 'foo' when both could match.
+    """
+    if not rules:
+        raise ValueError("No rules to apply.")
+    ordered = sorted(rules, key=len, reverse=True)
+    return re.compile("|".join(f"(?:{r})" for r in ordered))
+
+
+def _scan_dir(path, matcher):
+    """Returns (subdirs, [(old_name, new_name), ...]) for a single directory."""
+    subdirs, renames = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir():
+                    # Like os.walk, leave directories (and links to them) alone, only descend into real ones
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                else:
+                    new_name = matcher.sub("", entry.name)
+                    # Rules that can match nothing, e.g. 're:(-arxiv)?', leave most names alone
+                    if new_name != entry.name:
+                        renames.append((entry.name, new_name))
+    except OSError as e:
+        print(f"\033[91mUnable to read {path}: {e}\033[0m")
+    return subdirs, renames
+
+
+def find_renames(root_dir, matcher, workers=None):
+    """
+    Walks root_dir once, scanning directories in parallel.
+    Gives back {directory: [(old_name, new_name), ...]} for every matching file.
+    """
+    planned = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_scan_dir, root_dir, matcher): root_dir}
+        while pending:
+            future = next(iter(pending))
+            path = pending.pop(future)
+            subdirs, renames = future.result()
+            if renames:
+                planned[path] = renames
+            for sub in subdirs:
+                pending[executor.submit(_scan_dir, sub, matcher)] = sub
+    return planned
+
+
+def find_collisions(path, renames):
+    """
+    Splits renames into (safe, collisions).
+    A collision is an empty result, two files landing on the same name,
+    or a target that already exists and isn't itself being (safely) renamed away.
+    """
+    by_target = defaultdict(list)
+    for old, new in renames:
+        by_target[new].append(old)
+
+    safe, collisions = [], []
+    for old, new in renames:
+        if not new.strip() or len(by_target[new]) > 1:
+            collisions.append((old, new))
+        else:
+            safe.append((old, new))
+
+    # Skipping one rename can leave its file in the way of another, so repeat until settled.
+    while True:
+        moving_away = {old for old, _ in safe}
+        blocked = [
+            (old, new)
+            for old, new in safe
+            if os.path.exists(os.path.join(path, new)) and new not in moving_away
+        ]
+        if not blocked:
+            return safe, collisions
+        collisions.extend(blocked)
+        safe = [r for r in safe if r not in blocked]
+
+
+def _order_renames(path, renames):
+    """
+    Orders renames within one directory so none targets a file that's still to move.
+    Gives back (ordered, circular), circular being whatever can't be ordered, (a -> b, b -> a).
+    """
+    ordered = []
+    remaining = list(renames)
+    while remaining:
+        pending_sources = {old for old, _ in remaining}
+        ready = [(o, n) for o, n in remaining if n not in pending_sources]
+        if not ready:
+            # Nothing sensible to do but leave them.
+            print(f"\033[91mCircular renames in {path}, skipping: {remaining}\033[0m")
+            return ordered, remaining
+        ordered.extend(ready)
+        remaining = [r for r in remaining if r not in ready]
+    return ordered, []
+
+
+def _apply_in_order(path, renames):
+    """
+    Renames within one directory in the order given by _order_renames.
+    Gives back (done, failed), never overwriting a file that's already there.
+    """
+    ordered, failed = _order_renames(path, renames)
+    done = []
+    for old, new in ordered:
+        source, target = os.path.join(path, old), os.path.join(path, new)
+        try:
+            if os.path.exists(target):
+                raise FileExistsError(f"{target} already exists")
+            os.rename(source, target)
+            done.append((old, new))
+        except OSError as e:
+            print(f"\033[91mUnable to rename {source}: {e}\033[0m")
+            failed.append((old, new))
+    return done, failed
+
+
+def strip_patterns_from_files(root_dir, rules, dry_run=False, journal=None, workers=None):
+    """
+    Applies every rule (see load_rules) to the file names under root_dir in a single walk.
+    Only matched files are printed, followed by a summary.
+    """
+    matcher = compile_rules(rules)
+    print(f"Looking in: {root_dir} for files matching {len(rules)} rule(s)")
+
+    planned = find_renames(root_dir, matcher, workers)
+
+    renamed, collided, errored = 0, 0, 0
+    journal_file = open(journal, "a", encoding="utf-8") if journal else None
+    try:
+        for path in sorted(planned):
+            safe, collisions = find_collisions(path, planned[path])
+            for old, new in collisions:
+                collided += 1
+                print(f"\033[91mCollision, skipping: {os.path.join(path, old)} -> {new}\033[0m")
+
+            if dry_run:
+                ordered, circular = _order_renames(path, safe)
+                errored += len(circular)
+                for old, new in ordered:
+                    print(f"old: {os.path.join(path, old)} -> new: {new}")
+                renamed += len(ordered)
+                continue
+
+            done, failed = _apply_in_order(path, safe)
+            errored += len(failed)
+            for old, new in done:
+                renamed += 1
+                print(f"Renamed: {os.path.join(path, old)} -> {new}")
+                if journal_file:
+                    journal_file.write(
+                        json.dumps(
+                            {
+                                "time": datetime.now().isoformat(),
+                                "old": os.path.join(path, old),
+                                "new": os.path.join(path, new),
+                            }
+                        )
+                        + "\n"
+                    )
+    finally:
+        if journal_file:
+            journal_file.close()
+
+    matched = sum(len(r) for r in planned.values())
+    verb = "Would rename" if dry_run else "Renamed"
+    print(
+        f"Matched: {matched}, {verb}: {renamed}, Collisions: {collided}, Errors: {errored}"
+    )
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Strip a specified keyword from file names."
@@ -33,11 +236,41 @@ def main():
         action="store_true",
         help="Simulate the action without making any changes.",
     )
-    parser.add_argument("keyword", type=str, help="Keyword to remove from file names.")
+    parser.add_argument(
+        "--rules",
+        type=str,
+        help="A file of patterns to strip, one per line, prefix regexes with 're:'.",
+    )
+    parser.add_argument(
+        "--journal",
+        type=str,
+        help="Append every rename made with --rules to this file as JSON lines.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of threads used to walk the directory tree with --rules.",
+    )
+    parser.add_argument(
+        "keyword", type=str, nargs="?", help="Keyword to remove from file names."
+    )
 
     args = parser.parse_args()
 
-    strip_keyword_from_files(args.input, args.keyword, args.dry_run)
+    if args.rules:
+        try:
+            rules = load_rules(args.rules)
+            compile_rules(rules)
+        except ValueError as e:
+            parser.error(str(e))
+        strip_patterns_from_files(
+            args.input, rules, args.dry_run, args.journal, args.workers
+        )
+    elif args.keyword:
+        strip_keyword_from_files(args.input, args.keyword, args.dry_run)
+    else:
+        parser.error("Either a keyword or --rules is required.")
 
 
 if __name__ == "__main__":